@@ -1,50 +1,209 @@
 import os
+import asyncio
+import atexit
+import queue
+import threading
 import random
+import re
 import requests
-import schedule
+from requests.adapters import HTTPAdapter
 import time
-import json
+import orjson
 import logging
-from typing import Dict, TypedDict, Union, List, Literal
+from operator import add
+from typing import Annotated, Dict, TypedDict, Union, List, Literal, Optional
 from datetime import datetime
 from dotenv import load_dotenv
+from cachetools import TTLCache
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from langgraph.graph import StateGraph, END
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import JsonOutputParser
 from langchain_ollama import ChatOllama
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
-import smtplib
+import aiosmtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
-# Set up logging
-logging.basicConfig(filename='weather_emergency.log', level=logging.DEBUG,
-                    format='%(asctime)s:%(levelname)s:%(message)s')
+load_dotenv()
 
-llm = ChatOllama(model="llama3.2", verbose=True)
+# Set up logging; LOG_LEVEL=DEBUG enables verbose output such as full email bodies
+logging.basicConfig(filename='weather_emergency.log', level=os.getenv("LOG_LEVEL", "INFO").upper(),
+                    format='%(asctime)s:%(levelname)s:%(message)s')
 
-load_dotenv()
+# keep_alive pins the model in Ollama between checks; num_predict caps decode length per call type
+llm = ChatOllama(model="llama3.2", keep_alive="30m", num_predict=512, num_ctx=1024, temperature=0)
+classifier_llm = ChatOllama(model="llama3.2", keep_alive="30m", num_predict=32, num_ctx=1024, temperature=0, format="json")
+
+# Shared HTTP session so repeated OpenWeatherMap calls reuse pooled keep-alive connections
+_session = requests.Session()
+_session.headers.update({"Connection": "keep-alive"})
+_session.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=32))
+_session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32))
+
+OPENWEATHER_BASE_URL = "http://api.openweathermap.org/data/2.5/weather"
+OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
+
+# Recent weather reports per city; set WEATHER_NO_CACHE=1 to always hit the API during emergencies
+WEATHER_CACHE_TTL = 300
+_weather_cache = TTLCache(maxsize=256, ttl=WEATHER_CACHE_TTL)
+
+# Persistent SMTP connection shared across alerts, see get_smtp()
+SMTP_NOOP_INTERVAL = 60
+_smtp: Optional[aiosmtplib.SMTP] = None
+_smtp_lock: Optional[asyncio.Lock] = None
+_smtp_last_used = 0.0
+
+# Email credentials are read once; call reload_env() after changing them at runtime
+SENDER_EMAIL = os.getenv("SENDER_EMAIL")
+RECEIVER_EMAIL = os.getenv("RECEIVER_EMAIL")
+EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
+
+def reload_env():
+    """Re-read .env and the environment into the cached configuration constants"""
+    global OPENWEATHER_API_KEY, SENDER_EMAIL, RECEIVER_EMAIL, EMAIL_PASSWORD, _smtp
+    load_dotenv()
+    OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
+    SENDER_EMAIL = os.getenv("SENDER_EMAIL")
+    RECEIVER_EMAIL = os.getenv("RECEIVER_EMAIL")
+    EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
+
+    # Drop the SMTP client logged in with the old credentials; get_smtp() reconnects on the next alert
+    if _smtp is not None:
+        _smtp.close()
+        _smtp = None
+
+# Disaster log records are queued by data_logging and written in batches by a background thread
+DISASTER_LOG_FILE = "disaster_log.txt"
+LOG_FLUSH_INTERVAL = 1.0
+LOG_FLUSH_RECORDS = 50
+_log_queue = queue.SimpleQueue()
+
+_log_thread: Optional[threading.Thread] = None
+
+def _log_writer(log_file):
+    """Append queued log records to the disaster log, flushing every few records or seconds"""
+    try:
+        with log_file:
+            pending = 0
+            last_flush = time.monotonic()
+            while True:
+                try:
+                    record = _log_queue.get(timeout=LOG_FLUSH_INTERVAL)
+                except queue.Empty:
+                    record = b""
+                if record is None:
+                    log_file.flush()
+                    return
+                if record:
+                    log_file.write(record)
+                    pending += 1
+                if pending and (pending >= LOG_FLUSH_RECORDS or time.monotonic() - last_flush >= LOG_FLUSH_INTERVAL):
+                    log_file.flush()
+                    pending = 0
+                    last_flush = time.monotonic()
+    except Exception as e:
+        logging.error("Disaster log writer stopped, records are no longer written: %s", e)
+
+def _stop_log_writer():
+    """Flush outstanding log records before the interpreter exits"""
+    if _log_thread is not None and _log_thread.is_alive():
+        _log_queue.put(None)
+        _log_thread.join(timeout=5)
+
+def _ensure_log_writer():
+    """Start the log writer on first use and raise if it has since died"""
+    global _log_thread
+    if _log_thread is None:
+        # Opened here so a missing directory or permission error surfaces in data_logging
+        log_file = open(DISASTER_LOG_FILE, "ab")
+        _log_thread = threading.Thread(target=_log_writer, args=(log_file,), name="disaster-log-writer", daemon=True)
+        _log_thread.start()
+        atexit.register(_stop_log_writer)
+    elif not _log_thread.is_alive():
+        raise RuntimeError("disaster log writer is not running, see earlier errors")
+
+# Prompt templates and chains are built once at import instead of on every node call
+CLASSIFY_PROMPT = ChatPromptTemplate.from_template(
+    "Based on the following weather conditions, identify if there's a potential weather disaster "
+    "and assess its severity.\n"
+    "Weather conditions:\n"
+    "- Description: {weather}\n"
+    "- Wind Speed: {wind_speed} m/s\n"
+    "- Temperature: {temperature}°C\n"
+    "- Humidity: {humidity}%\n"
+    "- Pressure: {pressure} hPa\n"
+    "Categorize the disaster type into one of these types: Hurricane, Flood, Heatwave, Severe Storm, Winter Storm, or No Immediate Threat.\n"
+    "Rate the severity as either 'Critical', 'High', 'Medium', or 'Low'.\n"
+    "Respond ONLY as JSON with keys disaster_type and severity, "
+    "e.g. {{\"disaster_type\": \"Flood\", \"severity\": \"High\"}}"
+)
+
+EMERGENCY_PROMPT = ChatPromptTemplate.from_template(
+    "Create an emergency response plan for a {disaster_type} situation "
+    "with {severity} severity level in {city}. Include immediate actions needed."
+)
+
+CIVIL_PROMPT = ChatPromptTemplate.from_template(
+    "Create a civil defense response plan for a {disaster_type} situation "
+    "with {severity} severity level in {city}. Focus on public safety measures."
+)
+
+PUBLIC_PROMPT = ChatPromptTemplate.from_template(
+    "Create a public works response plan for a {disaster_type} situation "
+    "with {severity} severity level in {city}. Focus on infrastructure protection."
+)
+
+CLASSIFY_CHAIN = CLASSIFY_PROMPT | classifier_llm
+EMERGENCY_CHAIN = EMERGENCY_PROMPT | llm
+CIVIL_CHAIN = CIVIL_PROMPT | llm
+PUBLIC_CHAIN = PUBLIC_PROMPT | llm
 
 class WeatherState(TypedDict):
     city: str
     weather_data: Dict
     disaster_type: str
     severity: str
+    disaster_norm: str
+    severity_norm: str
     response: str
-    messages: List[Union[SystemMessage, HumanMessage, AIMessage]]
-    alerts: List[str]
+    # Nodes return only their new entries; the add reducer appends them to the running lists
+    messages: Annotated[List[Union[SystemMessage, HumanMessage, AIMessage]], add]
+    alerts: Annotated[List[str], add]
     human_approved: bool
 
-def get_weather_data(state: WeatherState) -> Dict:
+_INITIAL_STATE_TEMPLATE: WeatherState = {
+    "city": "",
+    "weather_data": {},
+    "disaster_type": "",
+    "severity": "",
+    "disaster_norm": "",
+    "severity_norm": "",
+    "response": "",
+    "messages": [],
+    "alerts": [],
+    "human_approved": False
+}
+
+async def get_weather_data(state: WeatherState) -> Dict:
     """Fetch weather data from OpenWeatherMap API"""
-    BASE_URL = "http://api.openweathermap.org/data/2.5/weather"
-    API_KEY = os.getenv("OPENWEATHER_API_KEY")
+    # Read per call so operators can switch the cache off mid-emergency without a restart
+    no_cache = os.getenv("WEATHER_NO_CACHE", "").strip().lower() in ("1", "true", "yes")
+    if not no_cache and (cached := _weather_cache.get(state["city"])):
+        logging.info("Weather Report for %s (cached): %s", state["city"], cached)
+        return {
+            "weather_data": cached,
+            "messages": [SystemMessage(content=f"Weather data loaded from cache for {state['city']}")]
+        }
 
-    request_url = f"{BASE_URL}?appid={API_KEY}&q={state['city']}"
     try:
-        response = requests.get(request_url)
+        response = await asyncio.to_thread(
+            _session.get, OPENWEATHER_BASE_URL,
+            params={"appid": OPENWEATHER_API_KEY, "q": state["city"]}, timeout=5
+        )
         response.raise_for_status()
 
-        data = response.json()
+        data = orjson.loads(response.content)
         weather_data = {
             "weather": data.get('weather', [{}])[0].get("description", "N/A"),
             "wind_speed": data.get("wind", {}).get("speed", "N/A"),
@@ -54,176 +213,174 @@ def get_weather_data(state: WeatherState) -> Dict:
             "humidity": data.get("main", {}).get("humidity", "N/A"),
             "pressure": data.get("main", {}).get("pressure", "N/A")
         }
+        _weather_cache[state["city"]] = weather_data
 
-        logging.info(f"Weather Report for {state['city']}: {weather_data}")
+        logging.info("Weather Report for %s: %s", state["city"], weather_data)
         return {
-            **state,
             "weather_data": weather_data,
-            "messages": state["messages"] + [SystemMessage(content=f"Weather data fetched successfully for {state['city']}")]
+            "messages": [SystemMessage(content=f"Weather data fetched successfully for {state['city']}")]
         }
 
     except Exception as e:
-        logging.error(f"Failed to fetch weather data for {state['city']}: {str(e)}")
+        logging.error("Failed to fetch weather data for %s: %s", state["city"], e)
         return {
-            **state,
             "weather_data": {"weather": "N/A", "wind_speed": "N/A", "cloud_cover": "N/A", "sea_level": "N/A", "temperature": "N/A", "humidity": "N/A", "pressure": "N/A"},
-            "messages": state["messages"] + [SystemMessage(content=f"Failed to fetch weather data for {state['city']}: {str(e)}")]
+            "messages": [SystemMessage(content=f"Failed to fetch weather data for {state['city']}: {str(e)}")]
         }
 
-def analyze_disaster_type(state: WeatherState) -> WeatherState:
-    """Analyze weather data to identify potential disasters"""
-    weather_data = state["weather_data"]
-    prompt = ChatPromptTemplate.from_template(
-        "Based on the following weather conditions, identify if there's a potential weather disaster.\n"
-        "Weather conditions:\n"
-        "- Description: {weather}\n"
-        "- Wind Speed: {wind_speed} m/s\n"
-        "- Temperature: {temperature}°C\n"
-        "- Humidity: {humidity}%\n"
-        "- Pressure: {pressure} hPa\n"
-        "Categorize into one of these types: Hurricane, Flood, Heatwave, Severe Storm, Winter Storm, or No Immediate Threat"
+# Readings inside these bounds with no alarming description skip the LLM classification
+CALM_MAX_WIND_SPEED = 10
+CALM_TEMPERATURE_RANGE = (0, 35)
+THREAT_KEYWORDS = ("storm", "hurricane", "flood", "snow", "extreme", "tornado", "squall")
+
+def _to_float(value) -> Optional[float]:
+    """Convert a weather reading to float, returning None for missing values such as 'N/A'"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def is_obviously_calm(weather_data: Dict) -> bool:
+    """Check whether a weather reading is clearly benign without asking the LLM"""
+    wind_speed = _to_float(weather_data.get("wind_speed"))
+    temperature = _to_float(weather_data.get("temperature"))
+    if wind_speed is None or temperature is None:
+        return False
+
+    description = str(weather_data.get("weather", "")).lower()
+    return (
+        wind_speed < CALM_MAX_WIND_SPEED
+        and CALM_TEMPERATURE_RANGE[0] < temperature < CALM_TEMPERATURE_RANGE[1]
+        and not any(keyword in description for keyword in THREAT_KEYWORDS)
     )
 
+# Both values must appear with their closing quote before the stream is cut short
+_DISASTER_TYPE_RE = re.compile(r'"disaster_type"\s*:\s*"([^"]*)"')
+_SEVERITY_RE = re.compile(r'"severity"\s*:\s*"(critical|high|medium|low)"', re.IGNORECASE)
+_classification_parser = JsonOutputParser()
+
+async def stream_classification(weather_data: Dict) -> Dict:
+    """Stream the classification JSON and stop decoding once a complete severity level has arrived"""
+    text = ""
+    stream = CLASSIFY_CHAIN.astream(weather_data)
     try:
-        chain = prompt | llm
-        disaster_type = chain.invoke(weather_data).content
+        async for chunk in stream:
+            text += chunk.content
+            disaster_match = _DISASTER_TYPE_RE.search(text)
+            severity_match = _SEVERITY_RE.search(text)
+            if disaster_match and severity_match:
+                return {"disaster_type": disaster_match.group(1), "severity": severity_match.group(1)}
+    finally:
+        await stream.aclose()
+    return _classification_parser.parse(text)
+
+async def classify_disaster(state: WeatherState) -> WeatherState:
+    """Identify the potential disaster type and its severity in a single LLM call"""
+    weather_data = state["weather_data"]
 
-        logging.info(f"Disaster Type Analysis for {state['city']}: {disaster_type}")
-        return {
-            **state,
-            "disaster_type": disaster_type,
-            "messages": state["messages"] + [SystemMessage(content=f"Disaster type identified: {disaster_type}")]
-        }
-    except Exception as e:
-        logging.error(f"Failed to analyze disaster type for {state['city']}: {str(e)}")
+    if is_obviously_calm(weather_data):
+        logging.info("Disaster Classification for %s: No Immediate Threat (calm conditions, LLM skipped)", state["city"])
         return {
-            **state,
-            "disaster_type": "Analysis Failed",
-            "messages": state["messages"] + [SystemMessage(content=f"Failed to analyze disaster type: {str(e)}")]
+            "disaster_type": "No Immediate Threat",
+            "severity": "",
+            "disaster_norm": "no immediate threat",
+            "severity_norm": "",
+            "messages": [SystemMessage(content="Disaster type identified: No Immediate Threat (calm conditions)")]
         }
 
-def assess_severity(state: WeatherState) -> WeatherState:
-    """Assess the severity of the identified weather situation"""
-    weather_data = state["weather_data"]
-    prompt = ChatPromptTemplate.from_template(
-        "Given the weather conditions and identified disaster type '{disaster_type}', "
-        "assess the severity level. Consider:\n"
-        "- Weather: {weather}\n"
-        "- Wind Speed: {wind_speed} m/s\n"
-        "- Temperature: {temperature}°C\n"
-        "Respond with either 'Critical', 'High', 'Medium', or 'Low'"
-    )
-
     try:
-        chain = prompt | llm
-        severity = chain.invoke({
-            **weather_data,
-            "disaster_type": state["disaster_type"]
-        }).content
+        classification = await stream_classification(weather_data)
+        disaster_type = str(classification["disaster_type"])
+        severity = str(classification["severity"])
 
-        logging.info(f" Severity Assessment for {state['city']}: {severity}")
+        logging.info("Disaster Classification for %s: %s (%s severity)", state["city"], disaster_type, severity)
         return {
-            **state,
+            "disaster_type": disaster_type,
             "severity": severity,
-            "messages": state["messages"] + [SystemMessage(content=f"Severity assessed as: {severity}")]
+            "disaster_norm": disaster_type.strip().lower(),
+            "severity_norm": severity.strip().lower(),
+            "messages": [
+                SystemMessage(content=f"Disaster type identified: {disaster_type}"),
+                SystemMessage(content=f"Severity assessed as: {severity}")
+            ]
         }
-
     except Exception as e:
-        logging.error(f"Failed to assess severity for {state['city']}: {str(e)}")
+        logging.error("Failed to classify disaster for %s: %s", state["city"], e)
         return {
-            **state,
+            "disaster_type": "Analysis Failed",
             "severity": "Assessment Failed",
-            "messages": state["messages"] + [SystemMessage(content=f"Failed to assess severity: {str(e)}")]
+            "disaster_norm": "analysis failed",
+            "severity_norm": "assessment failed",
+            "messages": [SystemMessage(content=f"Failed to classify disaster: {str(e)}")]
         }
 
-def emergency_response(state: WeatherState) -> WeatherState:
+async def emergency_response(state: WeatherState) -> WeatherState:
     """Generate emergency response plan"""
-    prompt = ChatPromptTemplate.from_template(
-        "Create an emergency response plan for a {disaster_type} situation "
-        "with {severity} severity level in {city}. Include immediate actions needed."
-    )
     try:
-        chain = prompt | llm
-        response = chain.invoke({
+        response = (await EMERGENCY_CHAIN.ainvoke({
             "disaster_type": state["disaster_type"],
             "severity": state["severity"],
             "city": state["city"]
-        }).content
+        })).content
 
-        logging.info(f"Emergency Response Plan for {state['city']}: {response}")
+        logging.info("Emergency Response Plan for %s: %s", state["city"], response)
         return {
-            **state,
             "response": response,
-            "messages": state["messages"] + [SystemMessage(content="Emergency response plan generated")]
+            "messages": [SystemMessage(content="Emergency response plan generated")]
         }
 
     except Exception as e:
-        logging.error(f"Failed to generate emergency response plan for {state['city']}: {str(e)}")
+        logging.error("Failed to generate emergency response plan for %s: %s", state["city"], e)
         return {
-            **state,
             "response": "Failed to generate response plan",
-            "messages": state["messages"] + [SystemMessage(content=f"Failed to generate emergency response: {str(e)}")]
+            "messages": [SystemMessage(content=f"Failed to generate emergency response: {str(e)}")]
         }
 
-def civil_defense_response(state: WeatherState) -> WeatherState:
+async def civil_defense_response(state: WeatherState) -> WeatherState:
     """Generate civil defense response plan"""
-    prompt = ChatPromptTemplate.from_template(
-        "Create a civil defense response plan for a {disaster_type} situation "
-        "with {severity} severity level in {city}. Focus on public safety measures."
-    )
     try:
-        chain = prompt | llm
-        response = chain.invoke({
+        response = (await CIVIL_CHAIN.ainvoke({
             "disaster_type": state["disaster_type"],
             "severity": state["severity"],
             "city": state["city"]
-        }).content
+        })).content
 
-        logging.info(f"Civil Defense Response Plan for {state['city']}: {response}")
+        logging.info("Civil Defense Response Plan for %s: %s", state["city"], response)
         return {
-            **state,
             "response": response,
-            "messages": state["messages"] + [SystemMessage(content="Civil defense response plan generated")]
+            "messages": [SystemMessage(content="Civil defense response plan generated")]
         }
 
     except Exception as e:
-        logging.error(f"Failed to generate civil defense response plan for {state['city']}: {str(e)}")
+        logging.error("Failed to generate civil defense response plan for %s: %s", state["city"], e)
         return {
-            **state,
             "response": "Failed to generate response plan",
-            "messages": state["messages"] + [SystemMessage(content=f"Failed to generate civil defense response: {str(e)}")]
+            "messages": [SystemMessage(content=f"Failed to generate civil defense response: {str(e)}")]
         }
 
-def public_works_response(state: WeatherState) -> WeatherState:
+async def public_works_response(state: WeatherState) -> WeatherState:
     """Generate public works response plan"""
-    prompt = ChatPromptTemplate.from_template(
-        "Create a public works response plan for a {disaster_type} situation "
-        "with {severity} severity level in {city}. Focus on infrastructure protection."
-    )
     try:
-        chain = prompt | llm
-        response = chain.invoke({
+        response = (await PUBLIC_CHAIN.ainvoke({
             "disaster_type": state["disaster_type"],
             "severity": state["severity"],
             "city": state["city"]
-        }).content
+        })).content
 
-        logging.info(f"Public Works Response Plan for {state['city']}: {response}")
+        logging.info("Public Works Response Plan for %s: %s", state["city"], response)
         return {
-            **state,
             "response": response,
-            "messages": state["messages"] + [SystemMessage(content="Public works response plan generated")]
+            "messages": [SystemMessage(content="Public works response plan generated")]
         }
 
     except Exception as e:
-        logging.error(f"Failed to generate public works response plan for {state['city']}: {str(e)}")
+        logging.error("Failed to generate public works response plan for %s: %s", state["city"], e)
         return {
-            **state,
             "response": "Failed to generate response plan",
-            "messages": state["messages"] + [SystemMessage(content=f"Failed to generate public works response: {str(e)}")]
+            "messages": [SystemMessage(content=f"Failed to generate public works response: {str(e)}")]
         }
 
-def data_logging(state: WeatherState) -> WeatherState:
+async def data_logging(state: WeatherState) -> WeatherState:
     """Log weather data, disaster analysis, and response to a file."""
     log_data = {
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -235,61 +392,85 @@ def data_logging(state: WeatherState) -> WeatherState:
     }
 
     try:
-        with open("disaster_log.txt", "a") as log_file:
-            log_file.write(json.dumps(log_data) + "\n")
+        _ensure_log_writer()
+        _log_queue.put(orjson.dumps(log_data, option=orjson.OPT_APPEND_NEWLINE))
 
-        logging.info("Data logged successfully.")
+        logging.info("Data queued for the disaster log.")
         return {
-            **state,
-            "messages": state["messages"] + [SystemMessage(content="Data logged successfully")]
+            "messages": [SystemMessage(content="Data queued for the disaster log")]
         }
     except Exception as e:
-        logging.error(f"Failed to log data: {str(e)}")
+        logging.error("Failed to log data: %s", e)
         return {
-            **state,
-            "messages": state["messages"] + [SystemMessage(content=f"Failed to log data: {str(e)}")]
+            "messages": [SystemMessage(content=f"Failed to log data: {str(e)}")]
         }
 
-def get_human_verification(state: WeatherState) -> WeatherState:
+async def get_human_verification(state: WeatherState) -> WeatherState:
     """Get human verification for low/medium severity alerts"""
-    severity = state["severity"].strip().lower()
+    severity = state["severity_norm"]
 
     if severity in ["low", "medium"]:
-        logging.info(f"Low/Medium severity alert for {state['city']} requires human approval.")
+        logging.info("Low/Medium severity alert for %s requires human approval.", state["city"])
         # Simulate human approval for testing purposes
         approved = True  # Change this to False to simulate rejection
-        logging.info(f"Human verification result: {'Approved' if approved else 'Rejected'}")
+        logging.info("Human verification result: %s", 'Approved' if approved else 'Rejected')
         return {
-            **state,
             "human_approved": approved,
-            "messages": state["messages"] + [
+            "messages": [
                 SystemMessage(content=f"Human verification: {'Approved' if approved else 'Rejected'}")
             ]
         }
     else:
-        logging.info(f"Auto-approving {severity} severity alert for {state['city']}.")
+        logging.info("Auto-approving %s severity alert for %s.", severity, state["city"])
         return {
-            **state,
             "human_approved": True,
-            "messages": state["messages"] + [
+            "messages": [
                 SystemMessage(content=f"Auto-approved {severity} severity alert")
             ]
         }
 
-def send_email_alert(state: WeatherState) -> WeatherState:
-    """Send weather alert email"""
-    load_dotenv()
+async def get_smtp() -> aiosmtplib.SMTP:
+    """Return the shared authenticated SMTP client, (re)connecting when needed"""
+    global _smtp, _smtp_lock, _smtp_last_used
+
+    if _smtp_lock is None:
+        _smtp_lock = asyncio.Lock()
 
-    sender_email = os.getenv("SENDER_EMAIL")
-    receiver_email = os.getenv("RECEIVER_EMAIL")
-    password = os.getenv("EMAIL_PASSWORD")
+    async with _smtp_lock:
+        if _smtp is not None and _smtp.is_connected:
+            # Ping connections that sat idle between checks so a silent server-side timeout is caught here
+            if time.monotonic() - _smtp_last_used < SMTP_NOOP_INTERVAL:
+                return _smtp
+            try:
+                await _smtp.noop()
+                _smtp_last_used = time.monotonic()
+                return _smtp
+            except (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPResponseException):
+                logging.info("SMTP connection was dropped by the server, reconnecting.")
+                _smtp.close()
+                _smtp = None
+
+        client = aiosmtplib.SMTP(hostname="smtp.gmail.com", port=587, start_tls=True)
+        await client.connect()
+        try:
+            await client.login(SENDER_EMAIL, EMAIL_PASSWORD)
+        except Exception:
+            client.close()
+            raise
+        _smtp = client
+        _smtp_last_used = time.monotonic()
+        return _smtp
+
+async def send_email_alert(state: WeatherState) -> WeatherState:
+    """Send weather alert email"""
+    global _smtp_last_used
 
     msg = MIMEMultipart()
-    msg['From'] = sender_email
-    msg['To'] = receiver_email
+    msg['From'] = SENDER_EMAIL
+    msg['To'] = RECEIVER_EMAIL
 
     # Check if a disaster type is identified
-    if state['disaster_type'] and state['severity']:
+    if state['disaster_type'] and state['severity'] and not _is_no_threat(state):
         msg['Subject'] = f"Weather Alert: {state['severity']} severity weather event in {state['city']}"
     else:
         msg['Subject'] = f"Weather Report for {state['city']}"
@@ -298,31 +479,32 @@ def send_email_alert(state: WeatherState) -> WeatherState:
     msg.attach(MIMEText(body, 'plain'))
 
     try:
-        server = smtplib.SMTP("smtp.gmail.com", 587)
-        server.starttls()
-        server.login(sender_email, password)
-        server.sendmail(sender_email, receiver_email, msg.as_string())
-        server.quit()
+        try:
+            await (await get_smtp()).send_message(msg)
+        except aiosmtplib.SMTPServerDisconnected:
+            await (await get_smtp()).send_message(msg)
 
-        logging.info(f"Successfully sent email for {state['city']}.")
+        _smtp_last_used = time.monotonic()
+        logging.info("Successfully sent email for %s.", state["city"])
         return {
-            **state,
-            "messages": state["messages"] + [SystemMessage(content=f"Successfully sent email for {state['city']}")],
-            "alerts": state["alerts"] + [f"Email alert sent: {datetime.now()}"]
+            "messages": [SystemMessage(content=f"Successfully sent email for {state['city']}")],
+            "alerts": [f"Email alert sent: {datetime.now()}"]
         }
 
-    except smtplib.SMTPAuthenticationError:
+    except aiosmtplib.SMTPAuthenticationError as e:
+        error = str(e)
         logging.error("SMTP Authentication Error: Check your email and password.")
-    except smtplib.SMTPConnectError:
+    except aiosmtplib.SMTPConnectError as e:
+        error = str(e)
         logging.error("SMTP Connect Error: Unable to connect to the SMTP server.")
     except Exception as e:
-        logging.error(f"Failed to send email alert: {str(e)}")
+        error = str(e)
+        logging.error("Failed to send email alert: %s", error)
     return {
-        **state,
-        "messages": state["messages"] + [SystemMessage(content=f"Failed to send email alert: {str(e)}")]
+        "messages": [SystemMessage(content=f"Failed to send email alert: {error}")]
     }
 
-def handle_no_approval(state: WeatherState) -> WeatherState:
+async def handle_no_approval(state: WeatherState) -> WeatherState:
     """Handle cases where human verification was rejected"""
     logging.info("Verification was not approved by human, Email not sent")
     message = (
@@ -332,19 +514,25 @@ def handle_no_approval(state: WeatherState) -> WeatherState:
     )
 
     return {
-        **state,
-        "messages": state["messages"] + [SystemMessage(content=message)]
+        "messages": [SystemMessage(content=message)]
     }
 
+def _is_no_threat(state: WeatherState) -> bool:
+    """Whether a city needs only a weather report: no threat detected and no high/critical severity"""
+    return "no immediate threat" in state["disaster_norm"] and state["severity_norm"] not in ["critical", "high"]
+
 def route_response(state: WeatherState) -> Literal[
     "emergency_response", "send_email_alert", "civil_defense_response", "public_works_response"]:
     """Route to appropriate department based on disaster type and severity"""
-    disaster = state["disaster_type"].strip().lower()
-    severity = state["severity"].strip().lower()
+    disaster = state["disaster_norm"]
+    severity = state["severity_norm"]
 
-    logging.info(f"Routing decision based on disaster type: {disaster} and severity: {severity}")
+    logging.info("Routing decision based on disaster type: %s and severity: %s", disaster, severity)
 
-    if severity in ["critical", "high"]:
+    if _is_no_threat(state):
+        logging.info("Routing to 'send_email_alert' as no immediate threat was detected.")
+        return "send_email_alert"
+    elif severity in ["critical", "high"]:
         logging.info("Routing to 'emergency_response' due to high or critical severity.")
         return "emergency_response"
     elif "flood" in disaster or "storm" in disaster:
@@ -363,132 +551,179 @@ def verify_approval_router(state: WeatherState) -> Literal["send_email_alert", "
         logging.info("Human approval rejected, routing to 'handle_no_approval'.")
         return "handle_no_approval"
 
-def format_weather_email(state: WeatherState) -> str:
-    """Format weather data and severity assessment into an email message"""
-    weather_data = state["weather_data"]
-
-    # Start constructing the email content
-    email_content = f"""
-Weather Report for {state['city']}
+_EMAIL_TMPL = """
+Weather Report for {city}
 
 Current Weather Conditions:
-- Weather Description: {weather_data['weather']}
-- Temperature: {weather_data['temperature']}°C
-- Wind Speed: {weather_data['wind_speed']} m/s
-- Humidity: {weather_data['humidity']}%
-- Pressure: {weather_data['pressure']} hPa
-- Cloud Cover: {weather_data['cloud_cover']}%
+- Weather Description: {weather}
+- Temperature: {temperature}°C
+- Wind Speed: {wind_speed} m/s
+- Humidity: {humidity}%
+- Pressure: {pressure} hPa
+- Cloud Cover: {cloud_cover}%
 
 """
 
-    # Include disaster information if applicable
-    if state['disaster_type'] and state['severity']:
-        email_content += f"""
-Disaster Type: {state['disaster_type']}
-Severity Level: {state['severity']}
+_EMAIL_DISASTER_TMPL = """
+Disaster Type: {disaster_type}
+Severity Level: {severity}
 
 Response Plan:
-{state['response']}
+{response}
 """
 
+def format_weather_email(state: WeatherState) -> str:
+    """Format weather data and severity assessment into an email message"""
+    fields = {**state["weather_data"], **state}
+
+    # Start constructing the email content
+    email_content = _EMAIL_TMPL.format_map(fields)
+
+    # Include disaster information if applicable
+    if state['disaster_type'] and state['severity'] and not _is_no_threat(state):
+        email_content += _EMAIL_DISASTER_TMPL.format_map(fields)
+
     email_content += f"This is an automated weather report generated at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
 
-    # Add extra note for low/medium severity
-    if state['severity'].lower() in ['low', 'medium']:
+    # Add extra note for low/medium severity alerts that went through human verification
+    if state['severity_norm'] in ['low', 'medium'] and state['human_approved']:
         email_content += "\nNote: This low/medium severity alert has been verified by a human operator."
 
-    logging.debug(f"Formatted email content:\n{email_content}")
+    logging.debug("Formatted email content:\n%s", email_content)
     return email_content
 
+def _add_response_stage(graph: StateGraph):
+    """Add the logging, response planning, verification and alerting nodes to a graph"""
+    graph.add_node("data_logging", data_logging)
+    graph.add_node("emergency_response", emergency_response)
+    graph.add_node("civil_defense_response", civil_defense_response)
+    graph.add_node("public_works_response", public_works_response)
+    graph.add_node("get_human_verification", get_human_verification)
+    graph.add_node("send_email_alert", send_email_alert)
+    graph.add_node("handle_no_approval", handle_no_approval)
+
+    # Conditional edges (decision points where routing is required)
+    graph.add_conditional_edges("data_logging", route_response)
+    graph.add_edge("civil_defense_response", "get_human_verification")
+    graph.add_edge("public_works_response", "get_human_verification")
+    graph.add_conditional_edges("get_human_verification", verify_approval_router)
+
+    # Proceed with sending email alerts or handling rejections
+    graph.add_edge("emergency_response", "send_email_alert")
+    graph.add_edge("send_email_alert", END)
+    graph.add_edge("handle_no_approval", END)
+
 # Create the workflow with WeatherState
 workflow = StateGraph(WeatherState)
 
 # Add nodes (each function is a node in the workflow)
 workflow.add_node("get_weather", get_weather_data)
-workflow.add_node("analyze_disaster", analyze_disaster_type)
-workflow.add_node("assess_severity", assess_severity)
-workflow.add_node("data_logging", data_logging)
-workflow.add_node("emergency_response", emergency_response)
-workflow.add_node("civil_defense_response", civil_defense_response)
-workflow.add_node("public_works_response", public_works_response)
-workflow.add_node("get_human_verification", get_human_verification)
-workflow.add_node("send_email_alert", send_email_alert)
-workflow.add_node("handle_no_approval", handle_no_approval)
+workflow.add_node("classify_disaster", classify_disaster)
+_add_response_stage(workflow)
 
 # Add edges to define the order of execution between nodes
-workflow.add_edge("get_weather", "analyze_disaster")
-workflow.add_edge("analyze_disaster", "assess_severity")
-workflow.add_edge("assess_severity", "data_logging")
-
-# Conditional edges (decision points where routing is required)
-workflow.add_conditional_edges("data_logging", route_response)
-workflow.add_edge("civil_defense_response", "get_human_verification")
-workflow.add_edge("public_works_response", "get_human_verification")
-workflow.add_conditional_edges("get_human_verification", verify_approval_router)
-
-# Proceed with sending email alerts or handling rejections
-workflow.add_edge("emergency_response", "send_email_alert")
-workflow.add_edge("send_email_alert", END)
-workflow.add_edge("handle_no_approval", END)
+workflow.add_edge("get_weather", "classify_disaster")
+workflow.add_edge("classify_disaster", "data_logging")
 
 # Set the entry point (start of the workflow)
 workflow.set_entry_point("get_weather")
 
 app = workflow.compile()
 
-def run_weather_emergency_system(city: str):
+# run_batch splits the same workflow into two stages so that short classification calls
+# from every city finish before any long response-plan decode starts on Ollama
+classification_workflow = StateGraph(WeatherState)
+classification_workflow.add_node("get_weather", get_weather_data)
+classification_workflow.add_node("classify_disaster", classify_disaster)
+classification_workflow.add_edge("get_weather", "classify_disaster")
+classification_workflow.add_edge("classify_disaster", END)
+classification_workflow.set_entry_point("get_weather")
+classification_app = classification_workflow.compile()
+
+response_workflow = StateGraph(WeatherState)
+_add_response_stage(response_workflow)
+response_workflow.set_entry_point("data_logging")
+response_app = response_workflow.compile()
+
+# Upper bound on city workflows in flight at once, so large city lists don't flood the APIs
+MAX_CONCURRENT_CITIES = 8
+
+def _initial_state(city: str) -> WeatherState:
+    """Build a fresh workflow state for a city from the shared template"""
+    initial_state = _INITIAL_STATE_TEMPLATE.copy()
+    initial_state["city"] = city
+    # Fresh containers so runs never share mutable state with the template
+    initial_state["weather_data"] = {}
+    initial_state["messages"] = []
+    initial_state["alerts"] = []
+    return initial_state
+
+async def run_weather_emergency_system(city: str):
     """Initialize and run the weather emergency system for a given city"""
-    initial_state = {
-        "city": city,
-        "weather_data": {},
-        "disaster_type": "",
-        "severity": "",
-        "response": "",
-        "messages": [],
-        "alerts": [],
-        "social_media_reports": [],
-        "human_approved": False
-    }
-
+    logging.info("Checking weather conditions for %s...", city)
     try:
-        result = app.invoke(initial_state)
-        logging.info(f"Completed weather check for {city}")
+        result = await app.ainvoke(_initial_state(city))
+        logging.info("Completed weather check for %s", city)
         return result
     except Exception as e:
-        logging.error(f"Error running weather emergency system: {str(e)}")
+        logging.error("Error running weather emergency system for %s: %s", city, e)
         return None
 
-def main():
+async def run_batch(cities: List[str]):
+    """Run the weather emergency system for several cities concurrently, classifying all of them first"""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_CITIES)
+
+    async def classify_city(city: str):
+        logging.info("Checking weather conditions for %s...", city)
+        async with semaphore:
+            try:
+                return await classification_app.ainvoke(_initial_state(city))
+            except Exception as e:
+                logging.error("Error classifying weather for %s: %s", city, e)
+                return None
+
+    async def respond_city(state: Optional[WeatherState]):
+        if state is None:
+            return None
+        async with semaphore:
+            try:
+                result = await response_app.ainvoke(state)
+                logging.info("Completed weather check for %s", state["city"])
+                return result
+            except Exception as e:
+                logging.error("Error running weather emergency system for %s: %s", state["city"], e)
+                return None
+
+    # Short bin: weather fetch and classification for every city
+    classified = await asyncio.gather(*(classify_city(city) for city in cities))
+    # Long bin: response plans (no-threat cities only log and email, without an LLM call)
+    return await asyncio.gather(*(respond_city(state) for state in classified))
+
+async def main():
     """Main function to run the weather emergency system"""
     os.environ["SENDER_EMAIL"] = ""  # Replace with your email
     os.environ["RECEIVER_EMAIL"] = ""  # Replace with recipient email
     os.environ["EMAIL_PASSWORD"] = "EMAIL_APP_PASS"
+    reload_env()
     
-    def scheduled_check():
+    async def scheduled_check():
         """Function to perform scheduled checks for multiple cities"""
         cities = input("Enter the cities you want to check: ").split()
-        logging.info(f"Starting scheduled check at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        logging.info("Starting scheduled check at %s", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
 
-        for city in cities:
-            try:
-                logging.info(f"Checking weather conditions for {city}...")
-                run_weather_emergency_system(city)
-                time.sleep(2)  # Brief pause between cities
-            except Exception as e:
-                logging.error(f"Error checking {city}: {str(e)}")
+        try:
+            await run_batch(cities)
+        except Exception as e:
+            logging.error("Error checking cities %s: %s", cities, e)
 
-    # Schedule checks every hour
-    schedule.every(1).minute.do(scheduled_check)
+    # Schedule checks every minute on the running event loop
+    scheduler = AsyncIOScheduler()
+    scheduler.add_job(scheduled_check, "interval", minutes=1)
+    scheduler.start()
     logging.info("Weather Emergency Response System started.")
     logging.info("Monitoring scheduled for every minute.")
 
-    while True:
-        try:
-            schedule.run_pending()
-            time.sleep(1)
-        except Exception as e:
-            logging.error(f"Error in main loop: {str(e)}")
-            time.sleep(1)
+    await asyncio.Event().wait()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file